@@ -1,6 +1,8 @@
-# Ядро: извлечение признаков (MediaPipe) и калибратор (Ridge)
+# Ядро: извлечение признаков (MediaPipe), калибратор (Ridge) и аналитика взгляда
 
+from .schema import FEATURE_SCHEMA, FeatureBuffer
 from .extractor import GazeExtractor
-from .calibrator import GazeCalibrator
+from .calibrator import FeatureMap, GazeCalibrator
+from .analytics import Fixation, GazeAnalytics
 
-__all__ = ["GazeExtractor", "GazeCalibrator"]
+__all__ = ["GazeExtractor", "GazeCalibrator", "FeatureMap", "GazeAnalytics", "Fixation", "FeatureBuffer", "FEATURE_SCHEMA"]
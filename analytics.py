@@ -0,0 +1,346 @@
+"""
+Потоковая аналитика взгляда после калибратора: фиксации (I-VT, I-DT) и тепловые карты.
+
+Координаты — нормализованные (x, y) в [0, 1], как их возвращает GazeCalibrator.predict,
+время — в секундах. Каждый шаг потокового режима — O(1) амортизированно, память ограничена
+независимо от длины сессии. Для записанных сессий есть пакетные функции с тем же результатом.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class Fixation(NamedTuple):
+    """Фиксация: время начала и конца (с), центроид (x, y), число отсчётов."""
+
+    start: float
+    end: float
+    x: float
+    y: float
+    n_samples: int
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class IVTDetector:
+    """
+    I-VT: отсчёт принадлежит фиксации, если скорость относительно предыдущего
+    отсчёта ниже порога (единиц экрана в секунду). Хранит только суммы текущей группы.
+    """
+
+    def __init__(self, velocity_threshold: float = 1.0, min_duration: float = 0.1):
+        self.velocity_threshold = velocity_threshold
+        self.min_duration = min_duration
+        self._last: Optional[Tuple[float, float, float]] = None
+        self._reset_group()
+
+    def _reset_group(self) -> None:
+        self._n = 0
+        self._sx = 0.0
+        self._sy = 0.0
+        self._t_start = 0.0
+        self._t_end = 0.0
+
+    def update(self, t: float, x: float, y: float) -> Optional[Fixation]:
+        """Добавить отсчёт. Возвращает фиксацию, если она только что завершилась."""
+        v = 0.0
+        if self._last is not None:
+            lt, lx, ly = self._last
+            v = math.hypot(x - lx, y - ly) / max(t - lt, 1e-9)
+        self._last = (t, x, y)
+        if v < self.velocity_threshold:
+            if self._n == 0:
+                self._t_start = t
+            self._n += 1
+            self._sx += x
+            self._sy += y
+            self._t_end = t
+            return None
+        return self.flush()
+
+    def flush(self) -> Optional[Fixation]:
+        """Закрыть текущую группу (конец сессии или саккада)."""
+        fix = None
+        if self._n and self._t_end - self._t_start >= self.min_duration:
+            fix = Fixation(self._t_start, self._t_end, self._sx / self._n, self._sy / self._n, self._n)
+        self._reset_group()
+        return fix
+
+
+class IDTDetector:
+    """
+    I-DT: фиксация — окно длительностью не меньше min_duration с дисперсией
+    (max_x - min_x) + (max_y - min_y) не больше порога; окно расширяется, пока порог
+    не превышен. Минимумы/максимумы кандидатного окна — монотонные очереди, поэтому
+    каждый отсчёт добавляется и удаляется один раз. Во время фиксации точки не хранятся,
+    только границы и суммы.
+    """
+
+    def __init__(self, max_dispersion: float = 0.05, min_duration: float = 0.1, max_window: int = 1024):
+        self.max_dispersion = max_dispersion
+        self.min_duration = min_duration
+        self.max_window = max_window
+        self._buf: Deque[Tuple[float, float, float]] = deque()
+        self._head = 0  # глобальный индекс первого элемента _buf
+        self._count = 0  # глобальный индекс следующего отсчёта
+        # (индекс, значение): _xmax/_ymax убывают, _xmin/_ymin возрастают
+        self._xmax: Deque[Tuple[int, float]] = deque()
+        self._xmin: Deque[Tuple[int, float]] = deque()
+        self._ymax: Deque[Tuple[int, float]] = deque()
+        self._ymin: Deque[Tuple[int, float]] = deque()
+        self._in_fix = False
+        self._box = (0.0, 0.0, 0.0, 0.0)  # xmin, xmax, ymin, ymax текущей фиксации
+        self._n = 0
+        self._sx = 0.0
+        self._sy = 0.0
+        self._t_start = 0.0
+        self._t_end = 0.0
+
+    @staticmethod
+    def _push_mono(q: Deque[Tuple[int, float]], i: int, v: float, keep_larger: bool) -> None:
+        while q and (q[-1][1] <= v if keep_larger else q[-1][1] >= v):
+            q.pop()
+        q.append((i, v))
+
+    def _window_dispersion(self) -> float:
+        return (self._xmax[0][1] - self._xmin[0][1]) + (self._ymax[0][1] - self._ymin[0][1])
+
+    def _pop_front(self) -> None:
+        self._buf.popleft()
+        for q in (self._xmax, self._xmin, self._ymax, self._ymin):
+            if q[0][0] == self._head:
+                q.popleft()
+        self._head += 1
+
+    def _clear_window(self) -> None:
+        self._buf.clear()
+        for q in (self._xmax, self._xmin, self._ymax, self._ymin):
+            q.clear()
+        self._head = self._count
+
+    def update(self, t: float, x: float, y: float) -> Optional[Fixation]:
+        """Добавить отсчёт. Возвращает фиксацию, если она только что завершилась."""
+        fix = None
+        if self._in_fix:
+            xmin, xmax, ymin, ymax = self._box
+            xmin, xmax = min(xmin, x), max(xmax, x)
+            ymin, ymax = min(ymin, y), max(ymax, y)
+            if (xmax - xmin) + (ymax - ymin) <= self.max_dispersion:
+                self._box = (xmin, xmax, ymin, ymax)
+                self._n += 1
+                self._sx += x
+                self._sy += y
+                self._t_end = t
+                return None
+            fix = self.flush()
+
+        i = self._count
+        self._count += 1
+        self._buf.append((t, x, y))
+        self._push_mono(self._xmax, i, x, True)
+        self._push_mono(self._xmin, i, x, False)
+        self._push_mono(self._ymax, i, y, True)
+        self._push_mono(self._ymin, i, y, False)
+        while len(self._buf) > 1 and (
+            self._window_dispersion() > self.max_dispersion or len(self._buf) > self.max_window
+        ):
+            self._pop_front()
+        if self._buf[-1][0] - self._buf[0][0] >= self.min_duration:
+            self._in_fix = True
+            self._box = (self._xmin[0][1], self._xmax[0][1], self._ymin[0][1], self._ymax[0][1])
+            self._n = len(self._buf)
+            self._sx = sum(p[1] for p in self._buf)
+            self._sy = sum(p[2] for p in self._buf)
+            self._t_start = self._buf[0][0]
+            self._t_end = self._buf[-1][0]
+            self._clear_window()
+        return fix
+
+    def flush(self) -> Optional[Fixation]:
+        """Закрыть текущую фиксацию (конец сессии). Кандидатное окно сохраняется."""
+        if not self._in_fix:
+            return None
+        self._in_fix = False
+        return Fixation(self._t_start, self._t_end, self._sx / self._n, self._sy / self._n, self._n)
+
+
+class DecayingHeatmap:
+    """
+    Тепловая карта экрана на фиксированной сетке с экспоненциальным затуханием.
+    Затухание ленивое: вес нового отсчёта масштабируется на exp(+λ(t - t_ref)),
+    а при чтении сетка умножается на exp(-λ(t - t_ref)); полная перенормировка
+    выполняется редко, поэтому добавление — O(1) амортизированно.
+    """
+
+    _MAX_LOG_SCALE = 30.0
+
+    def __init__(self, shape: Tuple[int, int] = (36, 64), half_life: Optional[float] = 30.0):
+        self.shape = shape
+        self.half_life = half_life
+        self._lam = 0.0 if not half_life else math.log(2.0) / half_life
+        self._grid = np.zeros(shape, dtype=np.float64)
+        self._t_ref: Optional[float] = None
+        self._t_last = 0.0
+
+    def add(self, t: float, x: float, y: float, weight: float = 1.0) -> None:
+        if self._t_ref is None:
+            self._t_ref = t
+        log_scale = self._lam * (t - self._t_ref)
+        if log_scale > self._MAX_LOG_SCALE:
+            self._grid *= math.exp(-log_scale)
+            self._t_ref = t
+            log_scale = 0.0
+        gh, gw = self.shape
+        col = min(max(int(x * gw), 0), gw - 1)
+        row = min(max(int(y * gh), 0), gh - 1)
+        self._grid[row, col] += weight * math.exp(log_scale)
+        self._t_last = max(self._t_last, t)
+
+    def snapshot(self, t: Optional[float] = None) -> np.ndarray:
+        """Копия карты на момент t (по умолчанию — время последнего отсчёта)."""
+        if self._t_ref is None:
+            return np.zeros(self.shape)
+        t = self._t_last if t is None else t
+        return self._grid * math.exp(-self._lam * (t - self._t_ref))
+
+    def reset(self) -> None:
+        self._grid[:] = 0.0
+        self._t_ref = None
+        self._t_last = 0.0
+
+
+class GazeAnalytics:
+    """
+    Стадия аналитики после GazeCalibrator.predict: детектор фиксаций (I-VT или I-DT),
+    тепловая карта отсчётов взгляда и тепловая карта фиксаций (вес — длительность).
+    Хранит последние max_fixations фиксаций.
+
+    update/flush вызываются из потока обработки; читать из других потоков следует через
+    heatmaps() и recent_fixations() — они берут ту же блокировку и возвращают копии.
+    """
+
+    def __init__(
+        self,
+        detector: str = "ivt",
+        grid: Tuple[int, int] = (36, 64),
+        half_life: Optional[float] = 30.0,
+        velocity_threshold: float = 1.0,
+        max_dispersion: float = 0.05,
+        min_duration: float = 0.1,
+        max_fixations: int = 1000,
+    ):
+        if detector == "ivt":
+            self.detector = IVTDetector(velocity_threshold, min_duration)
+        elif detector == "idt":
+            self.detector = IDTDetector(max_dispersion, min_duration)
+        else:
+            raise ValueError(f"Неизвестный детектор фиксаций: {detector!r} (ожидается 'ivt' или 'idt')")
+        self.gaze_heatmap = DecayingHeatmap(grid, half_life)
+        self.fixation_heatmap = DecayingHeatmap(grid, half_life)
+        self.fixations: Deque[Fixation] = deque(maxlen=max_fixations)
+        self.latest: Optional[Tuple[float, float, float]] = None
+        self._lock = threading.Lock()
+
+    def update(self, t: float, x: float, y: float) -> Optional[Fixation]:
+        """Обработать отсчёт взгляда. Возвращает завершившуюся фиксацию или None."""
+        with self._lock:
+            self.latest = (t, x, y)
+            self.gaze_heatmap.add(t, x, y)
+            return self._record(self.detector.update(t, x, y))
+
+    def flush(self) -> Optional[Fixation]:
+        """Завершить текущую фиксацию (конец сессии)."""
+        with self._lock:
+            return self._record(self.detector.flush())
+
+    def heatmaps(self, t: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Согласованные копии карт (отсчёты, фиксации) на момент t."""
+        with self._lock:
+            return self.gaze_heatmap.snapshot(t), self.fixation_heatmap.snapshot(t)
+
+    def recent_fixations(self) -> List[Fixation]:
+        """Копия истории фиксаций (от старых к новым)."""
+        with self._lock:
+            return list(self.fixations)
+
+    def _record(self, fix: Optional[Fixation]) -> Optional[Fixation]:
+        if fix is not None:
+            self.fixations.append(fix)
+            self.fixation_heatmap.add(fix.end, fix.x, fix.y, fix.duration)
+        return fix
+
+
+# --- Пакетный режим для записанных сессий ---
+
+
+def ivt_fixations(
+    t: np.ndarray, xy: np.ndarray, velocity_threshold: float = 1.0, min_duration: float = 0.1
+) -> List[Fixation]:
+    """Векторизованный I-VT: t (N,), xy (N, 2) -> список фиксаций (как у IVTDetector + flush)."""
+    t = np.asarray(t, dtype=np.float64)
+    xy = np.asarray(xy, dtype=np.float64)
+    if len(t) == 0:
+        return []
+    v = np.zeros(len(t))
+    v[1:] = np.hypot(*np.diff(xy, axis=0).T) / np.maximum(np.diff(t), 1e-9)
+    edges = np.diff(np.concatenate([[0], (v < velocity_threshold).astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = t[ends - 1] - t[starts] >= min_duration
+    starts, ends = starts[keep], ends[keep]
+    cs = np.concatenate([np.zeros((1, 2)), np.cumsum(xy, axis=0)])
+    n = ends - starts
+    centers = (cs[ends] - cs[starts]) / n[:, None]
+    return [
+        Fixation(float(t[s]), float(t[e - 1]), float(c[0]), float(c[1]), int(k))
+        for s, e, c, k in zip(starts, ends, centers, n)
+    ]
+
+
+def idt_fixations(
+    t: np.ndarray, xy: np.ndarray, max_dispersion: float = 0.05, min_duration: float = 0.1
+) -> List[Fixation]:
+    """
+    I-DT по записанной сессии. Не векторизован: окно I-DT зависит от того, где закончилась
+    предыдущая фиксация, поэтому это один линейный O(N) проход потокового IDTDetector
+    в Python (на порядок медленнее векторизованного ivt_fixations).
+    """
+    det = IDTDetector(max_dispersion, min_duration, max_window=max(len(t), 1))
+    out = []
+    for ti, (xi, yi) in zip(np.asarray(t).tolist(), np.asarray(xy).tolist()):
+        fix = det.update(ti, xi, yi)
+        if fix is not None:
+            out.append(fix)
+    fix = det.flush()
+    if fix is not None:
+        out.append(fix)
+    return out
+
+
+def accumulate_heatmap(
+    t: np.ndarray,
+    xy: np.ndarray,
+    shape: Tuple[int, int] = (36, 64),
+    half_life: Optional[float] = 30.0,
+    weights: Optional[np.ndarray] = None,
+    t_now: Optional[float] = None,
+) -> np.ndarray:
+    """Векторизованная тепловая карта сессии с затуханием на момент t_now (по умолчанию — последний отсчёт)."""
+    t = np.asarray(t, dtype=np.float64)
+    xy = np.asarray(xy, dtype=np.float64)
+    gh, gw = shape
+    if len(t) == 0:
+        return np.zeros(shape)
+    w = np.ones(len(t)) if weights is None else np.asarray(weights, dtype=np.float64)
+    if half_life:
+        t_now = t.max() if t_now is None else t_now
+        w = w * np.exp(-np.log(2.0) / half_life * (t_now - t))
+    cols = np.clip((xy[:, 0] * gw).astype(np.int64), 0, gw - 1)
+    rows = np.clip((xy[:, 1] * gh).astype(np.int64), 0, gh - 1)
+    return np.bincount(rows * gw + cols, weights=w, minlength=gh * gw).reshape(shape)
@@ -6,6 +6,7 @@
 import queue
 import sys
 import threading
+import time
 from pathlib import Path
 
 import cv2
@@ -21,8 +22,14 @@ except ImportError:
     print("Требуется Python с модулем tkinter.")
     sys.exit(1)
 
+try:
+    from PIL import Image, ImageTk
+except ImportError:
+    Image = ImageTk = None
+
 from extractor import GazeExtractor
 from calibrator import GazeCalibrator
+from analytics import GazeAnalytics
 
 # Точки калибровки [0, 1]
 CALIBRATION_MAP = np.column_stack([
@@ -31,6 +38,86 @@ CALIBRATION_MAP = np.column_stack([
 ])
 np.random.shuffle(CALIBRATION_MAP)
 FRAMES_PER_POINT = 25
+SESSIONS_DIR = ROOT / "sessions"  # записи калибровок для evaluate.py
+UPDATE_INTERVAL_MS = 25  # такт цикла GUI (шаги калибровки считаются в тактах)
+DISPLAY_FPS = 30  # верхняя граница частоты отрисовки, не зависит от частоты обработки
+PREVIEW_SIZE = (400, 400)
+GAZE_RADIUS = 12
+CALIB_RADIUS = 20
+
+
+def preview_size(frame_w: int, frame_h: int, box=PREVIEW_SIZE):
+    """Размер превью с сохранением пропорций внутри box (без увеличения, как thumbnail)."""
+    scale = min(box[0] / frame_w, box[1] / frame_h, 1.0)
+    return max(1, round(frame_w * scale)), max(1, round(frame_h * scale))
+
+
+class RenderLayer:
+    """
+    Retained-mode отрисовка: элементы холста создаются один раз и двигаются через coords,
+    превью камеры уменьшается быстрой билинейной интерполяцией в переиспользуемые буферы,
+    PhotoImage создаётся один раз на размер и обновляется через paste.
+    """
+
+    def __init__(self, canvas, cam_label, fps: float = DISPLAY_FPS):
+        self.canvas = canvas
+        self.cam_label = cam_label
+        self.min_interval = 1.0 / fps
+        self._last_render = float("-inf")
+        self._calib_item = canvas.create_oval(
+            0, 0, 0, 0, fill="#0f0", outline="#fff", width=2, state=tk.HIDDEN, tags="calib"
+        )
+        self._gaze_item = canvas.create_oval(
+            0, 0, 0, 0, fill="#e94560", outline="#fff", width=2, state=tk.HIDDEN, tags="gaze"
+        )
+        self._small = None
+        self._rgb = None
+        self._photo = None
+
+    def due(self, now: float) -> bool:
+        return now - self._last_render >= self.min_interval
+
+    def _advance(self, now: float) -> None:
+        # Срок следующего кадра отсчитывается от расписания, а не от момента отрисовки:
+        # иначе при такте 25 мс и интервале 33 мс рисуется каждый второй такт (20 FPS).
+        # При отставании больше чем на интервал расписание сдвигается на now, без серии догоняющих кадров.
+        scheduled = self._last_render + self.min_interval
+        self._last_render = scheduled if now - scheduled < self.min_interval else now
+
+    def _place(self, item, x: int, y: int, r: int) -> None:
+        self.canvas.coords(item, x - r, y - r, x + r, y + r)
+        self.canvas.itemconfigure(item, state=tk.NORMAL)
+
+    def render(self, now: float, gaze_xy, calib_xy=None, frame=None) -> None:
+        """Передвинуть маркеры (calib_xy=None — скрыть цель) и, если передан кадр, обновить превью."""
+        self._advance(now)
+        if calib_xy is None:
+            self.canvas.itemconfigure(self._calib_item, state=tk.HIDDEN)
+        else:
+            self._place(self._calib_item, int(calib_xy[0]), int(calib_xy[1]), CALIB_RADIUS)
+        self._place(self._gaze_item, int(gaze_xy[0]), int(gaze_xy[1]), GAZE_RADIUS)
+        if frame is not None:
+            self._show_frame(frame)
+
+    def _show_frame(self, frame_bgr: np.ndarray) -> None:
+        if Image is None:
+            self.cam_label.config(image="", text="[Видео]")
+            return
+        h, w = frame_bgr.shape[:2]
+        size = preview_size(w, h)
+        if self._small is None or self._small.shape[1::-1] != size:
+            self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self._rgb = np.empty_like(self._small)
+            self._photo = None
+        cv2.resize(frame_bgr, size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        # Зеркальное отражение и BGR -> RGB одним копированием в готовый буфер
+        np.copyto(self._rgb, self._small[:, ::-1, ::-1])
+        img = Image.fromarray(self._rgb)
+        if self._photo is None:
+            self._photo = ImageTk.PhotoImage(image=img)
+            self.cam_label.config(image=self._photo, text="")
+        else:
+            self._photo.paste(img)
 
 
 class GazeVisualizationApp:
@@ -43,6 +130,7 @@ class GazeVisualizationApp:
         self.cap = None
         self.extractor = None
         self.calibrator = None
+        self.analytics = None
         self.running = False
         self.calibrating = True
         self.calib_point_idx = 0
@@ -53,6 +141,7 @@ class GazeVisualizationApp:
         self.calib_path_var = tk.StringVar(value="")
         self.camera_idx_var = tk.IntVar(value=0)
         self._calib_target = (0.5, 0.5)
+        self._last_tick = 0.0
 
         self._build_ui()
         self._init_core()
@@ -85,6 +174,7 @@ class GazeVisualizationApp:
             bg="#1a1a2e", highlightthickness=1, highlightbackground="#444"
         )
         self.screen_canvas.pack(fill=tk.BOTH, expand=True)
+        self.renderer = RenderLayer(self.screen_canvas, self.cam_label)
         self.status_var = tk.StringVar(value="Нажмите «Старт». В начале — калибровка по точкам.")
         ttk.Label(main, textvariable=self.status_var).pack(side=tk.BOTTOM, pady=4)
 
@@ -181,6 +271,8 @@ class GazeVisualizationApp:
 
     def _process_frame_worker(self):
         w, h = self.screen_size[0], self.screen_size[1]
+        # Своя ссылка: при перезапуске потока self.analytics заменяется новым экземпляром
+        analytics = self.analytics
         while self.running and self.extractor is not None and self.calibrator is not None:
             try:
                 frame = self.frame_queue.get(timeout=0.05)
@@ -194,6 +286,8 @@ class GazeVisualizationApp:
                     self.calibrator.add(key_points, tx, ty)
                 else:
                     x_norm, y_norm = self.calibrator.predict(key_points)
+                    if analytics is not None:
+                        analytics.update(time.monotonic(), x_norm, y_norm)
                     gaze_x = x_norm * w
                     gaze_y = y_norm * h
             try:
@@ -204,6 +298,9 @@ class GazeVisualizationApp:
                 except queue.Empty:
                     pass
                 self.result_queue.put_nowait((frame.copy(), gaze_x, gaze_y))
+        # Фиксация закрывается в потоке обработки, после последнего update
+        if analytics is not None:
+            analytics.flush()
 
     def _toggle_stream(self):
         if self.running:
@@ -243,6 +340,7 @@ class GazeVisualizationApp:
             messagebox.showerror("Ошибка", "Не удалось открыть камеру.")
             return
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.analytics = GazeAnalytics()
         self.calib_point_idx = 0
         self.frames_at_point = 0
         self.calibrating = not self.calibrator.fitted
@@ -254,6 +352,7 @@ class GazeVisualizationApp:
         self.worker_thread.start()
         self.btn_start.config(text="Стоп")
         self.status_var.set("Калибровка: смотрите в зелёную точку. Затем — траектория взгляда.")
+        self._last_tick = time.monotonic()
         self._update_frame()
 
     def _update_frame(self):
@@ -265,41 +364,40 @@ class GazeVisualizationApp:
                 self.frames_at_point = 0
                 self.calib_point_idx += 1
                 if self.calib_point_idx >= len(CALIBRATION_MAP):
-                    self.calibrator.fit()
+                    # Сначала останавливаем сбор примеров в потоке обработки, затем обучаем и сохраняем
                     self.calibrating = False
-                    self.status_var.set("Калибровка завершена. Траектория взгляда.")
+                    self.calibrator.fit()
+                    status = "Калибровка завершена. Траектория взгляда."
+                    try:
+                        self.calibrator.save_session(SESSIONS_DIR / time.strftime("session_%Y%m%d_%H%M%S.npz"))
+                    except (OSError, ValueError) as e:
+                        status += f" Не удалось сохранить сессию: {e}"
+                    self.status_var.set(status)
                 else:
                     self._calib_target = (
                         float(CALIBRATION_MAP[self.calib_point_idx, 0]),
                         float(CALIBRATION_MAP[self.calib_point_idx, 1]),
                     )
-        result = None
-        try:
-            result = self.result_queue.get_nowait()
-        except queue.Empty:
-            pass
-        if result is not None:
-            frame, gaze_x, gaze_y = result
-            px, py = int(gaze_x), int(gaze_y)
-            self.screen_canvas.delete("gaze")
-            self.screen_canvas.delete("calib")
-            if self.calibrating:
-                cx = int(self._calib_target[0] * self.screen_size[0])
-                cy = int(self._calib_target[1] * self.screen_size[1])
-                self.screen_canvas.create_oval(cx - 20, cy - 20, cx + 20, cy + 20, fill="#0f0", outline="#fff", width=2, tags="calib")
-            r = 12
-            self.screen_canvas.create_oval(px - r, py - r, px + r, py + r, fill="#e94560", outline="#fff", width=2, tags="gaze")
-            frame_show = cv2.flip(frame, 1)
-            frame_rgb = cv2.cvtColor(frame_show, cv2.COLOR_BGR2RGB)
+        now = time.monotonic()
+        # Если цикл GUI опаздывает больше чем на такт — двигаем только маркеры, кадр пропускаем
+        behind = now - self._last_tick > 2 * UPDATE_INTERVAL_MS / 1000.0
+        self._last_tick = now
+        if self.renderer.due(now):
+            result = None
             try:
-                from PIL import Image, ImageTk
-                img = Image.fromarray(frame_rgb)
-                img.thumbnail((400, 400))
-                self.photo = ImageTk.PhotoImage(image=img)
-                self.cam_label.config(image=self.photo, text="")
-            except ImportError:
-                self.cam_label.config(image="", text="[Видео]")
-        self.root.after(25, self._update_frame)
+                result = self.result_queue.get_nowait()
+            except queue.Empty:
+                pass
+            if result is not None:
+                frame, gaze_x, gaze_y = result
+                calib_xy = None
+                if self.calibrating:
+                    calib_xy = (
+                        self._calib_target[0] * self.screen_size[0],
+                        self._calib_target[1] * self.screen_size[1],
+                    )
+                self.renderer.render(now, (gaze_x, gaze_y), calib_xy, None if behind else frame)
+        self.root.after(UPDATE_INTERVAL_MS, self._update_frame)
 
     def _quit(self):
         self.running = False
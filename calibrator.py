@@ -7,43 +7,202 @@ from typing import List, Optional, Tuple, Union
 import numpy as np
 from sklearn.linear_model import Ridge
 
+try:
+    from .schema import N_FEATURES, N_ROWS, ROWS, FeatureBuffer
+except ImportError:
+    from schema import N_FEATURES, N_ROWS, ROWS, FeatureBuffer
+
+FEATURE_KINDS = ("linear", "poly2", "rff")
+
+
+class FeatureMap:
+    """
+    Нелинейное расширение признаков поверх плоского key_points.
+
+    Из key_points берётся сокращённый набор (центры левого и правого глаза, центры радужек,
+    масштаб, смещение головы -> 12 чисел), он стандартизуется по данным калибровки и:
+      - "linear": без расширения;
+      - "poly2":  добавляются все мономы 2-й степени (квадраты и попарные произведения);
+      - "rff":    добавляются случайные признаки Фурье (RBF-ядро) с фиксированным seed.
+    Исходные плоские признаки сохраняются, расширение дописывается справа.
+    Все операции векторизованы: на вход (B, F), на выход (B, F + K).
+    """
+
+    def __init__(
+        self, kind: str = "linear", n_components: int = 128, gamma: Optional[float] = None, seed: int = 0
+    ):
+        if kind not in FEATURE_KINDS:
+            raise ValueError(f"Неизвестный тип признаков: {kind!r} (ожидается один из {FEATURE_KINDS})")
+        self.kind = kind
+        self.n_components = int(n_components)
+        self.gamma = None if gamma is None else float(gamma)
+        self.seed = int(seed)
+        self.proj: Optional[np.ndarray] = None
+        self.offset: Optional[np.ndarray] = None
+        self.W: Optional[np.ndarray] = None
+        self.b: Optional[np.ndarray] = None
+        self._iu: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def reduction_matrix(n_features: int) -> np.ndarray:
+        """
+        Линейная свёртка (F,) -> (D,): средние по группам строк key_points.
+        Группы — центры глаз, центры радужек, масштаб, смещение головы (D = 12).
+        Определено только для раскладки schema; на других раскладках — ValueError.
+        Сокращение линейно, поэтому применяется одним матричным умножением.
+        """
+        if n_features != N_FEATURES:
+            raise ValueError(
+                f"Нелинейные признаки требуют раскладку schema ({N_FEATURES} признаков), получено {n_features}"
+            )
+        n_rows = N_ROWS
+        groups = [
+            range(n_rows)[ROWS["left_eye"]],
+            range(n_rows)[ROWS["right_eye"]],
+            [ROWS["left_iris"].start],
+            [ROWS["right_iris"].start],
+            range(n_rows)[ROWS["scale"]],
+            range(n_rows)[ROWS["head_offset"]],
+        ]
+        A = np.zeros((n_rows, 2, len(groups), 2))
+        for g, rows in enumerate(groups):
+            A[list(rows), :, g] = np.eye(2) / len(rows)
+        return A.reshape(n_features, 2 * len(groups))
+
+    def fit(self, X: np.ndarray) -> "FeatureMap":
+        """Оценить стандартизацию по обучающим данным и (для rff) сгенерировать проекцию."""
+        if self.kind == "linear":
+            return self
+        A = self.reduction_matrix(X.shape[1])
+        R = X @ A
+        mean = R.mean(axis=0)
+        std = R.std(axis=0)
+        std[std < 1e-6] = 1.0  # постоянные признаки (например, масштаб до движения головы) не растягиваем
+        # Стандартизация встраивается в проекцию: Z = X @ proj + offset
+        self.proj = (A / std).astype(np.float32)
+        self.offset = (-mean / std).astype(np.float32)
+        d = A.shape[1]
+        self._iu = np.triu_indices(d)
+        if self.kind == "rff":
+            rng = np.random.default_rng(self.seed)
+            gamma = 1.0 / d if self.gamma is None else self.gamma  # ширина ядра по умолчанию ~ размерности
+            self.W = rng.normal(0.0, np.sqrt(2.0 * gamma), size=(d, self.n_components)).astype(np.float32)
+            self.b = rng.uniform(0.0, 2.0 * np.pi, size=self.n_components).astype(np.float32)
+        return self
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """(B, F) -> (B, F + K) с расширенными признаками."""
+        if self.kind == "linear":
+            return X
+        Z = X @ self.proj
+        Z += self.offset
+        if self.kind == "poly2":
+            i, j = self._iu
+            return np.concatenate([X, Z, Z[:, i] * Z[:, j]], axis=1)
+        extra = Z @ self.W
+        extra += self.b
+        np.cos(extra, out=extra)
+        extra *= np.sqrt(2.0 / self.n_components)
+        return np.concatenate([X, extra], axis=1)
+
+    def state(self) -> dict:
+        """Параметры отображения для сохранения в файл калибровки."""
+        return {
+            "kind": self.kind,
+            "n_components": self.n_components,
+            "gamma": self.gamma,
+            "seed": self.seed,
+            "proj": self.proj,
+            "offset": self.offset,
+            "W": self.W,
+            "b": self.b,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "FeatureMap":
+        fm = cls(state["kind"], state["n_components"], state["gamma"], state["seed"])
+        fm.proj = state["proj"]
+        fm.offset = state["offset"]
+        if fm.proj is not None:
+            fm._iu = np.triu_indices(fm.proj.shape[1])
+        fm.W = state["W"]
+        fm.b = state["b"]
+        return fm
+
 
 class GazeCalibrator:
     """Сбор пар (признаки, целевая точка), обучение Ridge, предсказание и сохранение в файл."""
 
-    def __init__(self, alpha: float = 0.5):
+    def __init__(self, alpha: float = 0.5, features: Union[str, FeatureMap] = "linear"):
         self.reg_x = Ridge(alpha=alpha)
         self.reg_y = Ridge(alpha=alpha)
-        self.X: List[np.ndarray] = []
+        self.features = features if isinstance(features, FeatureMap) else FeatureMap(features)
+        self.X = FeatureBuffer()
         self.Y_x: List[float] = []
         self.Y_y: List[float] = []
         self._fitted = False
+        self._n_features: Optional[int] = None  # ширина key_points, на которой обучена модель
+        # Коэффициенты обеих регрессий одной матрицей: predict без накладных расходов sklearn
+        self._coef: Optional[np.ndarray] = None
+        self._intercept: Optional[np.ndarray] = None
 
     def add(self, key_points: np.ndarray, screen_x: float, screen_y: float) -> None:
         """Добавить пример для калибровки."""
-        flat = key_points.flatten().reshape(1, -1)
-        self.X.append(flat)
+        self.X.append(key_points)
         self.Y_x.append(screen_x)
         self.Y_y.append(screen_y)
 
+    def add_batch(self, key_points: np.ndarray, targets: np.ndarray) -> None:
+        """Добавить пачку примеров: key_points (B, N, 2), targets (B, 2)."""
+        self.X.extend(key_points)
+        self.Y_x.extend(np.asarray(targets)[:, 0].tolist())
+        self.Y_y.extend(np.asarray(targets)[:, 1].tolist())
+
+    def _snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Накопленные (features, targets) одинаковой длины: add из другого потока может быть в процессе."""
+        n = min(len(self.X), len(self.Y_x), len(self.Y_y))
+        targets = np.column_stack([self.Y_x[:n], self.Y_y[:n]]).astype(np.float32)
+        return self.X.view()[:n], targets.reshape(n, 2)
+
+    def save_session(self, path: Union[str, Path]) -> None:
+        """Сохранить собранные данные калибровки (features, targets) в .npz для оценки."""
+        features, targets = self._snapshot()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, features=features, targets=targets)
+
     def fit(self) -> None:
         """Обучить Ridge по накопленным данным."""
-        if len(self.X) < 3:
+        features, targets = self._snapshot()
+        if len(features) < 3:
             self._fitted = False
             return
-        X = np.vstack(self.X)
-        self.reg_x.fit(X, self.Y_x)
-        self.reg_y.fit(X, self.Y_y)
+        X = features.reshape(len(features), -1)
+        Phi = self.features.fit(X).transform(X)
+        self.reg_x.fit(Phi, targets[:, 0])
+        self.reg_y.fit(Phi, targets[:, 1])
+        self._n_features = X.shape[1]
+        self._cache_coef()
         self._fitted = True
 
+    def _cache_coef(self) -> None:
+        self._coef = np.column_stack([self.reg_x.coef_, self.reg_y.coef_]).astype(np.float32)
+        self._intercept = np.array([self.reg_x.intercept_, self.reg_y.intercept_], dtype=np.float32)
+
     def predict(self, key_points: np.ndarray) -> Tuple[float, float]:
         """Вернуть нормализованные (x, y) в [0, 1]. Если не обучен — (0.5, 0.5)."""
         if not self._fitted:
             return 0.5, 0.5
-        flat = key_points.flatten().reshape(1, -1)
-        x = float(np.clip(self.reg_x.predict(flat)[0], 0.0, 1.0))
-        y = float(np.clip(self.reg_y.predict(flat)[0], 0.0, 1.0))
-        return x, y
+        xy = self.features.transform(key_points.reshape(1, -1)) @ self._coef + self._intercept
+        np.clip(xy, 0.0, 1.0, out=xy)
+        return float(xy[0, 0]), float(xy[0, 1])
+
+    def predict_batch(self, key_points: np.ndarray) -> np.ndarray:
+        """Пакетное предсказание: (B, N, 2) или (B, F) -> (B, 2) в [0, 1]."""
+        X = key_points.reshape(key_points.shape[0], -1)
+        if not self._fitted:
+            return np.full((X.shape[0], 2), 0.5)
+        xy = self.features.transform(X) @ self._coef + self._intercept
+        return np.clip(xy, 0.0, 1.0, out=xy)
 
     @property
     def fitted(self) -> bool:
@@ -53,16 +212,48 @@ class GazeCalibrator:
         Path(path).parent.mkdir(parents=True, exist_ok=True)
         with open(path, "wb") as f:
             pickle.dump(
-                {"reg_x": self.reg_x, "reg_y": self.reg_y, "fitted": self._fitted},
+                {
+                    "reg_x": self.reg_x,
+                    "reg_y": self.reg_y,
+                    "fitted": self._fitted,
+                    "n_features": self._n_features,
+                    "features": self.features.state(),
+                },
                 f,
             )
 
     @classmethod
     def load(cls, path: Union[str, Path]) -> "GazeCalibrator":
+        """Загрузить калибровку. ValueError, если файл записан для другой раскладки признаков."""
         with open(path, "rb") as f:
             data = pickle.load(f)
         cal = cls()
         cal.reg_x = data["reg_x"]
         cal.reg_y = data["reg_y"]
         cal._fitted = data.get("fitted", True)
+        cal._n_features = data.get("n_features")
+        if "features" in data:
+            cal.features = FeatureMap.from_state(data["features"])
+        if cal._fitted:
+            cal._check_layout()
+            cal._cache_coef()
         return cal
+
+    def _check_layout(self) -> None:
+        """Ширина коэффициентов должна соответствовать раскладке schema и отображению признаков."""
+        n = self._n_features
+        if n != N_FEATURES:
+            found = "не указана (файл старого формата)" if n is None else f"{n} признаков"
+            raise ValueError(
+                f"Калибровка записана для другой раскладки признаков: {found}, ожидается {N_FEATURES}. "
+                "Выполните калибровку заново."
+            )
+        proj = self.features.proj
+        if proj is not None and proj.shape[0] != n:
+            raise ValueError(f"Отображение признаков рассчитано на {proj.shape[0]} признаков, ожидается {n}")
+        width = self.features.transform(np.zeros((1, n), dtype=np.float32)).shape[1]
+        for reg in (self.reg_x, self.reg_y):
+            if np.shape(reg.coef_)[-1] != width:
+                raise ValueError(
+                    f"Ширина коэффициентов ({np.shape(reg.coef_)[-1]}) не совпадает с признаками ({width})"
+                )
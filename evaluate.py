@@ -0,0 +1,256 @@
+"""
+Оценка конфигураций калибратора на записанных сессиях калибровки.
+
+Сессия — файл .npz с массивами features (n, N, 2) и targets (n, 2), как его пишет
+GazeCalibrator.save_session. Для каждой пары (сессия, конфигурация) выполняется
+leave-one-point-out: модель обучается на всех точках калибровки, кроме одной, и
+предсказывает отложенную. Пары считаются параллельно в пуле процессов; результаты
+кэшируются на диске по хэшу сессии и конфигурации, поэтому повторный запуск считает
+только изменившееся.
+
+Время fit_ms и predict_us меряется в тех же процессах, поэтому каждый процесс (и
+последовательный прогон при --workers 1) ограничен одним потоком BLAS через threadpoolctl:
+N процессов не делят ядра между N многопоточными BLAS, и время сравнимо между запусками
+с разным --workers.
+
+Запуск: python evaluate.py sessions/ [--workers N] [--cache .eval_cache]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from threadpoolctl import threadpool_limits  # ставится вместе с scikit-learn
+
+try:
+    from .calibrator import FeatureMap, GazeCalibrator
+    from .schema import N_FEATURES
+except ImportError:
+    from calibrator import FeatureMap, GazeCalibrator
+    from schema import N_FEATURES
+
+# Меняется при изменении методики оценки — старые записи кэша перестают совпадать
+CACHE_VERSION = 2
+
+DEFAULT_CONFIGS: List[dict] = [
+    {"alpha": 0.5, "features": "linear"},
+    {"alpha": 5.0, "features": "linear"},
+    {"alpha": 0.5, "features": "poly2"},
+    {"alpha": 5.0, "features": "poly2"},
+    {"alpha": 0.5, "features": "rff", "n_components": 128, "seed": 0},
+    {"alpha": 0.1, "features": "rff", "n_components": 256, "gamma": 0.02, "seed": 0},
+]
+
+
+def make_calibrator(config: dict) -> GazeCalibrator:
+    """Калибратор по конфигурации: alpha, features и параметры FeatureMap."""
+    params = {k: v for k, v in config.items() if k not in ("alpha", "features")}
+    features = FeatureMap(config.get("features", "linear"), **params)
+    return GazeCalibrator(alpha=config.get("alpha", 0.5), features=features)
+
+
+def load_session(path: Union[str, Path]) -> Tuple[np.ndarray, np.ndarray]:
+    with np.load(path) as data:
+        return data["features"], data["targets"]
+
+
+def session_hash(path: Union[str, Path]) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def resolved_config(config: dict) -> dict:
+    """
+    Фактические параметры калибратора для конфигурации: умолчания подставлены,
+    gamma для rff разрешена в 1/D. Две записи одной модели дают один и тот же словарь.
+    """
+    cal = make_calibrator(config)
+    fm = cal.features
+    gamma = fm.gamma
+    if fm.kind == "rff" and gamma is None:
+        gamma = 1.0 / FeatureMap.reduction_matrix(N_FEATURES).shape[1]
+    return {
+        "ridge": cal.reg_x.get_params(),
+        "features": {"kind": fm.kind, "n_components": fm.n_components, "gamma": gamma, "seed": fm.seed},
+    }
+
+
+def config_hash(config: dict) -> str:
+    """Ключ кэша по разрешённым параметрам, раскладке признаков и версии методики."""
+    key = json.dumps(
+        {"config": resolved_config(config), "n_features": N_FEATURES, "version": CACHE_VERSION},
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def evaluate_session(features: np.ndarray, targets: np.ndarray, config: dict) -> Dict[str, float]:
+    """
+    Leave-one-point-out по точкам калибровки (уникальным targets).
+    Ошибка — евклидово расстояние в нормализованных координатах экрана.
+    """
+    points, point_id = np.unique(targets, axis=0, return_inverse=True)
+    point_id = point_id.reshape(-1)
+    errors = []
+    fit_times = []
+    predict_times = []
+    for p in range(len(points)):
+        held = point_id == p
+        cal = make_calibrator(config)
+        cal.add_batch(features[~held], targets[~held])
+        t0 = time.perf_counter()
+        cal.fit()
+        fit_times.append(time.perf_counter() - t0)
+        if not cal.fitted:
+            continue
+        pred = cal.predict_batch(features[held])
+        errors.append(np.linalg.norm(pred - targets[held], axis=1))
+        t0 = time.perf_counter()
+        for kp in features[held]:
+            cal.predict(kp)
+        predict_times.append((time.perf_counter() - t0) / held.sum())
+    err = np.concatenate(errors) if errors else np.array([np.nan])
+    return {
+        "n_points": int(len(points)),
+        "n_samples": int(len(targets)),
+        "mean_error": float(np.mean(err)),
+        "median_error": float(np.median(err)),
+        "p95_error": float(np.percentile(err, 95)),
+        "fit_ms": float(np.mean(fit_times) * 1e3) if fit_times else float("nan"),
+        "predict_us": float(np.mean(predict_times) * 1e6) if predict_times else float("nan"),
+    }
+
+
+def _evaluate_job(job: Tuple[str, dict]) -> Dict[str, float]:
+    path, config = job
+    features, targets = load_session(path)
+    return evaluate_session(features, targets, config)
+
+
+def _single_thread_blas() -> None:
+    """Инициализатор процесса пула: один поток BLAS, чтобы замеры времени не зависели от соседей."""
+    threadpool_limits(1)
+
+
+def _write_entry(entry: Path, record: dict) -> None:
+    """Атомарная запись в кэш: прерванный запуск не оставит обрезанный JSON, похожий на попадание."""
+    tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, entry)
+
+
+def _read_entry(entry: Path) -> Optional[dict]:
+    try:
+        return json.loads(entry.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def run(
+    sessions_dir: Union[str, Path],
+    configs: Optional[List[dict]] = None,
+    cache_dir: Union[str, Path] = ".eval_cache",
+    workers: Optional[int] = None,
+) -> List[dict]:
+    """
+    Оценить все конфигурации на всех сессиях каталога. Возвращает записи
+    {"session", "config", метрики..., "cached"}; каждая посчитанная запись кладётся в cache_dir
+    сразу по завершении задачи. Ошибка одной пары (сессия, конфигурация) не прерывает прогон:
+    она попадает в результаты как запись с полем "error" и не кэшируется.
+    """
+    configs = DEFAULT_CONFIGS if configs is None else configs
+    cache = Path(cache_dir)
+    cache.mkdir(parents=True, exist_ok=True)
+    results: List[dict] = []
+    pending: List[Tuple[Path, dict, Path]] = []
+    for path in sorted(Path(sessions_dir).glob("*.npz")):
+        s_hash = session_hash(path)
+        for config in configs:
+            entry = cache / f"{s_hash[:16]}_{config_hash(config)[:16]}.json"
+            record = _read_entry(entry) if entry.exists() else None
+            if record is not None:
+                record.update(session=path.name, cached=True)
+                results.append(record)
+            else:
+                pending.append((path, config, entry))
+
+    def finish(path: Path, config: dict, entry: Path, compute) -> None:
+        try:
+            record = {"config": config, **compute()}
+        except Exception as e:
+            results.append({"config": config, "session": path.name, "cached": False, "error": repr(e)})
+            return
+        _write_entry(entry, record)
+        record.update(session=path.name, cached=False)
+        results.append(record)
+
+    if workers == 1 or len(pending) == 1:
+        with threadpool_limits(1):
+            for path, config, entry in pending:
+                finish(path, config, entry, lambda: _evaluate_job((str(path), config)))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_single_thread_blas) as pool:
+            futures = {
+                pool.submit(_evaluate_job, (str(path), config)): (path, config, entry)
+                for path, config, entry in pending
+            }
+            for future in as_completed(futures):
+                finish(*futures[future], future.result)
+    return results
+
+
+def summarize(results: List[dict]) -> List[dict]:
+    """Средние метрики по сессиям для каждой конфигурации, по возрастанию ошибки."""
+    groups: Dict[str, List[dict]] = {}
+    for r in results:
+        if "error" in r:
+            continue
+        groups.setdefault(json.dumps(r["config"], sort_keys=True), []).append(r)
+    rows = []
+    for key, rs in groups.items():
+        row = {"config": json.loads(key), "sessions": len(rs)}
+        for metric in ("mean_error", "p95_error", "fit_ms", "predict_us"):
+            row[metric] = float(np.mean([r[metric] for r in rs]))
+        rows.append(row)
+    return sorted(rows, key=lambda r: r["mean_error"])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Оценка калибратора на записанных сессиях (leave-one-point-out).")
+    parser.add_argument("sessions", help="каталог с файлами сессий .npz")
+    parser.add_argument("--configs", help="JSON-файл со списком конфигураций (по умолчанию — встроенный набор)")
+    parser.add_argument("--cache", default=".eval_cache", help="каталог кэша результатов")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="число процессов (в каждом — один поток BLAS)")
+    args = parser.parse_args(argv)
+
+    configs = None
+    if args.configs:
+        configs = json.loads(Path(args.configs).read_text(encoding="utf-8"))
+    results = run(args.sessions, configs, args.cache, args.workers)
+    if not results:
+        print("Сессии не найдены.")
+        return
+    failed = [r for r in results if "error" in r]
+    computed = sum(not r["cached"] for r in results) - len(failed)
+    print(
+        f"Записей: {len(results)}, посчитано заново: {computed}, "
+        f"из кэша: {len(results) - computed - len(failed)}, ошибок: {len(failed)}"
+    )
+    for r in failed:
+        print(f"  ошибка: {r['session']} {json.dumps(r['config'], sort_keys=True)}: {r['error']}")
+    print(f"{'конфигурация':<82} {'сессий':>6} {'ошибка':>8} {'p95':>8} {'fit, мс':>9} {'predict, мкс':>13}")
+    for row in summarize(results):
+        cfg = json.dumps(row["config"], sort_keys=True)
+        print(
+            f"{cfg:<82} {row['sessions']:>6} {row['mean_error']:>8.4f} {row['p95_error']:>8.4f}"
+            f" {row['fit_ms']:>9.2f} {row['predict_us']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
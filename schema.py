@@ -0,0 +1,103 @@
+"""
+Схема признаков взгляда: фиксированный порядок строк key_points и буфер float32 для них.
+
+key_points — массив (N_ROWS, 2) float32, строки идут в порядке FEATURE_SCHEMA:
+  left_eye    16  контур левого глаза (MediaPipe FACEMESH_LEFT_EYE, уникальные индексы по возрастанию)
+  right_eye   16  контур правого глаза (FACEMESH_RIGHT_EYE)
+  left_iris    5  центр радужки 473 и её контур 474–477 (есть при refine_landmarks=True)
+  right_iris   5  центр радужки 468 и её контур 469–472
+  scale        1  (scale_x, scale_y) — масштаб лица относительно опорного кадра
+  head_offset  1  смещение головы относительно опорного кадра, пиксели
+Точки глаз и радужек — относительно центра лица, умножены на scale_x.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+LEFT_EYE = (249, 263, 362, 373, 374, 380, 381, 382, 384, 385, 386, 387, 388, 390, 398, 466)
+RIGHT_EYE = (7, 33, 133, 144, 145, 153, 154, 155, 157, 158, 159, 160, 161, 163, 173, 246)
+LEFT_IRIS = (473, 474, 475, 476, 477)
+RIGHT_IRIS = (468, 469, 470, 471, 472)
+
+FEATURE_SCHEMA: Tuple[Tuple[str, int], ...] = (
+    ("left_eye", len(LEFT_EYE)),
+    ("right_eye", len(RIGHT_EYE)),
+    ("left_iris", len(LEFT_IRIS)),
+    ("right_iris", len(RIGHT_IRIS)),
+    ("scale", 1),
+    ("head_offset", 1),
+)
+
+# Индексы ландмарок для строк, берущихся из Face Mesh (все строки до scale)
+LANDMARK_INDEX = np.array(LEFT_EYE + RIGHT_EYE + LEFT_IRIS + RIGHT_IRIS, dtype=np.intp)
+N_LANDMARK_ROWS = len(LANDMARK_INDEX)
+N_ROWS = sum(n for _, n in FEATURE_SCHEMA)
+N_FEATURES = 2 * N_ROWS
+
+ROWS = {}
+_start = 0
+for _name, _n in FEATURE_SCHEMA:
+    ROWS[_name] = slice(_start, _start + _n)
+    _start += _n
+del _start, _name, _n
+
+# Та же раскладка как структурный тип: (B, N_FEATURES) float32 смотрится как записи без копирования
+FEATURE_DTYPE = np.dtype([(name, np.float32, (n, 2)) for name, n in FEATURE_SCHEMA])
+
+
+class FeatureBuffer:
+    """
+    Предвыделенный непрерывный буфер key_points float32 (растёт удвоением).
+    Форма строки берётся из первого добавленного примера. view()/flat() — представления
+    без копирования, их можно сразу отдавать в пакетное предсказание или сохранять.
+    """
+
+    def __init__(self, capacity: int = 512):
+        self._capacity = max(int(capacity), 1)
+        self._data: Optional[np.ndarray] = None
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _reserve(self, row_shape: Tuple[int, ...], n_new: int) -> None:
+        if self._data is None:
+            self._data = np.empty((max(self._capacity, n_new),) + row_shape, dtype=np.float32)
+        elif self._n + n_new > len(self._data):
+            size = max(2 * len(self._data), self._n + n_new)
+            grown = np.empty((size,) + self._data.shape[1:], dtype=np.float32)
+            grown[: self._n] = self._data[: self._n]
+            self._data = grown
+
+    def append(self, key_points: np.ndarray) -> None:
+        self._reserve(key_points.shape, 1)
+        self._data[self._n] = key_points
+        self._n += 1
+
+    def extend(self, key_points: np.ndarray) -> None:
+        """Добавить пачку (B, N, 2) одним копированием."""
+        self._reserve(key_points.shape[1:], len(key_points))
+        self._data[self._n : self._n + len(key_points)] = key_points
+        self._n += len(key_points)
+
+    def view(self) -> np.ndarray:
+        """(n, N, 2) — накопленные примеры."""
+        if self._data is None:
+            return np.empty((0, N_ROWS, 2), dtype=np.float32)
+        return self._data[: self._n]
+
+    def flat(self) -> np.ndarray:
+        """(n, F) — те же данные в виде матрицы признаков."""
+        v = self.view()
+        return v.reshape(len(v), -1)
+
+    def records(self) -> np.ndarray:
+        """(n,) записи FEATURE_DTYPE с именованными полями (только для раскладки схемы)."""
+        flat = self.flat()
+        if flat.shape[1] != N_FEATURES:
+            raise ValueError(f"Раскладка ({flat.shape[1]} признаков) не совпадает со схемой ({N_FEATURES})")
+        return flat.view(FEATURE_DTYPE)[:, 0]
+
+    def clear(self) -> None:
+        self._n = 0
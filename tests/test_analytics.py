@@ -0,0 +1,158 @@
+"""
+Модульные тесты потоковой аналитики: фиксации I-VT / I-DT, тепловые карты, пакетный режим.
+"""
+
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import (
+    DecayingHeatmap,
+    GazeAnalytics,
+    IDTDetector,
+    IVTDetector,
+    accumulate_heatmap,
+    idt_fixations,
+    ivt_fixations,
+)
+
+
+def _synthetic_session(seed: int = 0, n_fix: int = 5, fps: float = 30.0):
+    """Сессия: n_fix фиксаций по ~0.3 с с мелким шумом, между ними — быстрые саккады."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0.1, 0.9, (n_fix, 2))
+    xy = []
+    for c in centers:
+        xy.append(c + rng.normal(0.0, 0.003, (9, 2)))
+    xy = np.vstack(xy)
+    t = np.arange(len(xy)) / fps
+    return t, xy, centers
+
+
+def _stream(detector, t, xy):
+    out = [f for f in (detector.update(ti, x, y) for ti, (x, y) in zip(t, xy)) if f]
+    last = detector.flush()
+    return out + ([last] if last else [])
+
+
+class TestFixationDetectors(unittest.TestCase):
+    """Сценарии: обнаружение фиксаций в потоковом режиме."""
+
+    def test_ivt_finds_each_fixation(self):
+        t, xy, centers = _synthetic_session()
+        fixations = _stream(IVTDetector(velocity_threshold=1.0, min_duration=0.1), t, xy)
+        self.assertEqual(len(fixations), len(centers))
+        for fix, c in zip(fixations, centers):
+            self.assertAlmostEqual(fix.x, c[0], delta=0.01)
+            self.assertAlmostEqual(fix.y, c[1], delta=0.01)
+
+    def test_idt_finds_each_fixation(self):
+        t, xy, centers = _synthetic_session(1)
+        fixations = _stream(IDTDetector(max_dispersion=0.05, min_duration=0.1), t, xy)
+        self.assertEqual(len(fixations), len(centers))
+        for fix, c in zip(fixations, centers):
+            self.assertAlmostEqual(fix.x, c[0], delta=0.01)
+            self.assertGreaterEqual(fix.duration, 0.1)
+
+    def test_short_dwell_is_not_fixation(self):
+        det = IVTDetector(velocity_threshold=1.0, min_duration=0.2)
+        t = np.arange(4) / 30.0
+        self.assertEqual(_stream(det, t, np.full((4, 2), 0.5)), [])
+
+    def test_idt_window_memory_is_bounded(self):
+        det = IDTDetector(max_dispersion=0.01, min_duration=10.0, max_window=16)
+        rng = np.random.default_rng(0)
+        for i, (x, y) in enumerate(rng.uniform(0.5, 0.505, (500, 2))):
+            det.update(i / 30.0, x, y)
+        self.assertLessEqual(len(det._buf), 16)
+
+
+class TestBatchMode(unittest.TestCase):
+    """Сценарии: пакетная обработка записанной сессии совпадает с потоковой."""
+
+    def test_ivt_batch_matches_stream(self):
+        t, xy, _ = _synthetic_session(2)
+        stream = _stream(IVTDetector(), t, xy)
+        batch = ivt_fixations(t, xy)
+        self.assertEqual(len(stream), len(batch))
+        for a, b in zip(stream, batch):
+            np.testing.assert_allclose(a, b)
+
+    def test_idt_batch_matches_stream(self):
+        t, xy, _ = _synthetic_session(3)
+        self.assertEqual(_stream(IDTDetector(), t, xy), idt_fixations(t, xy))
+
+    def test_heatmap_batch_matches_stream(self):
+        t, xy, _ = _synthetic_session(4)
+        hm = DecayingHeatmap((9, 16), half_life=0.5)
+        for ti, (x, y) in zip(t, xy):
+            hm.add(ti, x, y)
+        np.testing.assert_allclose(hm.snapshot(), accumulate_heatmap(t, xy, (9, 16), half_life=0.5))
+
+
+class TestDecayingHeatmap(unittest.TestCase):
+    """Сценарии: тепловая карта с затуханием."""
+
+    def test_half_life_halves_weight(self):
+        hm = DecayingHeatmap((4, 4), half_life=2.0)
+        hm.add(0.0, 0.1, 0.1)
+        self.assertAlmostEqual(hm.snapshot(2.0).sum(), 0.5)
+
+    def test_long_session_stays_finite(self):
+        hm = DecayingHeatmap((4, 4), half_life=0.1)
+        for i in range(2000):
+            hm.add(i * 0.05, 0.9, 0.9)
+        snap = hm.snapshot()
+        self.assertTrue(np.all(np.isfinite(snap)))
+        self.assertGreater(snap[3, 3], 0.0)
+
+
+class TestGazeAnalytics(unittest.TestCase):
+    """Сценарии: стадия аналитики после калибратора."""
+
+    def test_unknown_detector_raises(self):
+        with self.assertRaises(ValueError):
+            GazeAnalytics(detector="hmm")
+
+    def test_fixations_are_bounded_and_aggregated(self):
+        an = GazeAnalytics(detector="idt", grid=(9, 16), max_fixations=3)
+        t, xy, centers = _synthetic_session(5, n_fix=6)
+        for ti, (x, y) in zip(t, xy):
+            an.update(ti, x, y)
+        an.flush()
+        self.assertEqual(len(an.fixations), 3)
+        self.assertAlmostEqual(an.gaze_heatmap.snapshot().sum(), accumulate_heatmap(t, xy, (9, 16)).sum())
+        self.assertGreater(an.fixation_heatmap.snapshot().sum(), 0.0)
+
+    def test_concurrent_readers_get_consistent_copies(self):
+        """Чтение карт и фиксаций из другого потока во время update не ломает состояние."""
+        an = GazeAnalytics(grid=(9, 16), half_life=0.01)
+        t, xy, _ = _synthetic_session(6, n_fix=40)
+        errors = []
+
+        def writer():
+            try:
+                for ti, (x, y) in zip(t, xy):
+                    an.update(ti, x, y)
+                an.flush()
+            except Exception as e:  # pragma: no cover - сигнал о гонке
+                errors.append(e)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while thread.is_alive():
+            gaze, fix = an.heatmaps()
+            self.assertTrue(np.all(np.isfinite(gaze)) and np.all(np.isfinite(fix)))
+            an.recent_fixations()
+        thread.join()
+        self.assertEqual(errors, [])
+        np.testing.assert_allclose(an.recent_fixations(), ivt_fixations(t, xy))
+
+
+if __name__ == "__main__":
+    unittest.main()
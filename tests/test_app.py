@@ -35,6 +35,122 @@ class TestCalibrationConfig(unittest.TestCase):
         self.assertGreater(app_module.FRAMES_PER_POINT, 0)
 
 
+class TestRenderConfig(unittest.TestCase):
+    """Сценарии: параметры отрисовки."""
+
+    def test_display_fps_positive(self):
+        """Частота отрисовки ограничена положительным числом кадров в секунду."""
+        self.assertGreater(app_module.DISPLAY_FPS, 0)
+
+    def test_preview_size_keeps_aspect_ratio(self):
+        """Превью вписывается в PREVIEW_SIZE с сохранением пропорций."""
+        w, h = app_module.preview_size(640, 480)
+        self.assertLessEqual(w, app_module.PREVIEW_SIZE[0])
+        self.assertLessEqual(h, app_module.PREVIEW_SIZE[1])
+        self.assertAlmostEqual(w / h, 640 / 480, places=2)
+
+    def test_preview_size_does_not_upscale(self):
+        """Маленький кадр не увеличивается (как PIL thumbnail)."""
+        self.assertEqual(app_module.preview_size(160, 120), (160, 120))
+
+
+class _FakeCanvas:
+    """Минимальная замена tk.Canvas: запоминает координаты и состояние элементов."""
+
+    def __init__(self):
+        self.items = {}
+
+    def create_oval(self, *coords, **options):
+        item = len(self.items) + 1
+        self.items[item] = {"coords": coords, "state": options.get("state"), "tags": options.get("tags")}
+        return item
+
+    def coords(self, item, *coords):
+        self.items[item]["coords"] = coords
+
+    def itemconfigure(self, item, **options):
+        self.items[item].update(options)
+
+    def by_tag(self, tag):
+        return next(v for v in self.items.values() if v["tags"] == tag)
+
+
+class _FakeLabel:
+    def __init__(self):
+        self.options = {}
+
+    def config(self, **options):
+        self.options.update(options)
+
+
+class _FakePhoto:
+    def __init__(self, image):
+        self.size = image.size
+        self.pasted = 0
+
+    def paste(self, image):
+        self.pasted += 1
+
+
+def _count_renders(layer, ticks, interval=app_module.UPDATE_INTERVAL_MS / 1000.0, start=0.0):
+    n = 0
+    for i in range(ticks):
+        now = start + i * interval
+        if layer.due(now):
+            layer.render(now, (0, 0))
+            n += 1
+    return n
+
+
+class TestRenderLayer(unittest.TestCase):
+    """Сценарии: retained-mode отрисовка и ограничение частоты."""
+
+    def test_cadence_matches_display_fps(self):
+        """На тактах GUI частота отрисовки равна DISPLAY_FPS, а не кратному такту значению."""
+        layer = app_module.RenderLayer(_FakeCanvas(), _FakeLabel())
+        ticks = int(10.0 / (app_module.UPDATE_INTERVAL_MS / 1000.0))
+        self.assertAlmostEqual(_count_renders(layer, ticks) / 10.0, app_module.DISPLAY_FPS, delta=0.2)
+
+    def test_no_burst_after_stall(self):
+        """После долгой паузы цикла рисуется один кадр, без серии догоняющих."""
+        layer = app_module.RenderLayer(_FakeCanvas(), _FakeLabel())
+        layer.render(0.0, (0, 0))
+        layer.render(2.0, (0, 0))
+        self.assertFalse(layer.due(2.0 + 0.5 / app_module.DISPLAY_FPS))
+
+    def test_render_moves_items_and_hides_target(self):
+        canvas = _FakeCanvas()
+        layer = app_module.RenderLayer(canvas, _FakeLabel())
+        self.assertEqual(len(canvas.items), 2)
+        layer.render(0.0, (100, 50), (200, 80))
+        r = app_module.GAZE_RADIUS
+        self.assertEqual(canvas.by_tag("gaze")["coords"], (100 - r, 50 - r, 100 + r, 50 + r))
+        self.assertEqual(canvas.by_tag("calib")["state"], "normal")
+        layer.render(1.0, (10, 10))
+        self.assertEqual(canvas.by_tag("calib")["state"], "hidden")
+        self.assertEqual(len(canvas.items), 2)
+
+    def test_preview_reuses_photo_image(self):
+        """Превью: одно PhotoImage на размер, дальше paste; кадр отражён и переведён в RGB."""
+        if app_module.Image is None:
+            self.skipTest("Pillow не установлен")
+        original = app_module.ImageTk.PhotoImage
+        app_module.ImageTk.PhotoImage = _FakePhoto
+        try:
+            label = _FakeLabel()
+            layer = app_module.RenderLayer(_FakeCanvas(), label)
+            frame = np.zeros((480, 640, 3), dtype=np.uint8)
+            frame[:, -8:] = (255, 0, 0)  # синий справа в BGR
+            layer.render(0.0, (0, 0), frame=frame)
+            layer.render(1.0, (0, 0), frame=frame)
+        finally:
+            app_module.ImageTk.PhotoImage = original
+        photo = label.options["image"]
+        self.assertEqual(photo.size, (400, 300))
+        self.assertEqual(photo.pasted, 1)
+        np.testing.assert_array_equal(layer._rgb[0, 0], (0, 0, 255))
+
+
 class TestAppImports(unittest.TestCase):
     """Сценарии: корректность импортов и наличие классов."""
 
@@ -42,6 +158,10 @@ class TestAppImports(unittest.TestCase):
         """В модуле app определён класс GazeVisualizationApp."""
         self.assertTrue(hasattr(app_module, "GazeVisualizationApp"))
 
+    def test_render_layer_class_exists(self):
+        """В модуле app определён слой отрисовки RenderLayer."""
+        self.assertTrue(hasattr(app_module, "RenderLayer"))
+
     def test_main_function_exists(self):
         """В модуле app определена функция main."""
         self.assertTrue(callable(getattr(app_module, "main", None)))
@@ -2,6 +2,7 @@
 Модульные тесты калибратора (Ridge): добавление данных, обучение, предсказание, сохранение/загрузка.
 """
 
+import pickle
 import tempfile
 import unittest
 from pathlib import Path
@@ -11,10 +12,11 @@ import numpy as np
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from calibrator import GazeCalibrator
+from calibrator import FeatureMap, GazeCalibrator
+from schema import N_ROWS, ROWS
 
 
-def _make_key_points(seed: int = 0, n_points: int = 10) -> np.ndarray:
+def _make_key_points(seed: int = 0, n_points: int = N_ROWS) -> np.ndarray:
     """Синтетический вектор признаков (N, 2)."""
     rng = np.random.default_rng(seed)
     return rng.standard_normal((n_points, 2)).astype(np.float64)
@@ -54,6 +56,22 @@ class TestGazeCalibratorAddFit(unittest.TestCase):
         cal.fit()
         self.assertFalse(cal.fitted)
 
+    def test_fit_and_session_use_common_length(self):
+        """add в другом потоке прерван между X и Y: fit и save_session берут общую длину."""
+        cal = GazeCalibrator()
+        for i in range(4):
+            cal.add(_make_key_points(i), 0.2 * i, 0.5)
+        cal.X.append(_make_key_points(9))
+        cal.Y_x.append(0.9)
+        cal.fit()
+        self.assertTrue(cal.fitted)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.npz"
+            cal.save_session(path)
+            with np.load(path) as data:
+                self.assertEqual(len(data["features"]), 4)
+                self.assertEqual(data["targets"].shape, (4, 2))
+
     def test_fit_with_3_samples_sets_fitted(self):
         cal = GazeCalibrator()
         for i in range(3):
@@ -137,6 +155,109 @@ class TestGazeCalibratorSaveLoad(unittest.TestCase):
             kp = _make_key_points(seed)
             self.assertEqual(cal.predict(kp), loaded.predict(kp))
 
+    def test_load_rejects_baseline_34_row_file(self):
+        """Файл старого формата (34 строки, без n_features) не загружается как обученный."""
+        cal = GazeCalibrator()
+        for i in range(4):
+            cal.add(_make_key_points(i, n_points=34), 0.2 * i, 0.5)
+        cal.fit()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "old.pkl"
+            with open(path, "wb") as f:
+                pickle.dump({"reg_x": cal.reg_x, "reg_y": cal.reg_y, "fitted": True}, f)
+            with self.assertRaises(ValueError):
+                GazeCalibrator.load(path)
+
+    def test_load_rejects_foreign_n_features(self):
+        cal = GazeCalibrator()
+        for i in range(4):
+            cal.add(_make_key_points(i, n_points=34), 0.2 * i, 0.5)
+        cal.fit()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "calib.pkl"
+            cal.save(path)
+            with self.assertRaises(ValueError):
+                GazeCalibrator.load(path)
+
+
+class TestGazeCalibratorFeatures(unittest.TestCase):
+    """Сценарии: нелинейное расширение признаков (poly2, rff)."""
+
+    def _fitted(self, features) -> GazeCalibrator:
+        cal = GazeCalibrator(features=features)
+        for i in range(12):
+            cal.add(_make_key_points(i), 0.2 + 0.05 * i, 0.8 - 0.05 * i)
+        cal.fit()
+        return cal
+
+    def test_unknown_kind_raises(self):
+        with self.assertRaises(ValueError):
+            GazeCalibrator(features="cubic")
+
+    def test_foreign_layout_raises(self):
+        """Нелинейное расширение определено только для раскладки schema."""
+        cal = GazeCalibrator(features="poly2")
+        for i in range(4):
+            cal.add(_make_key_points(i, n_points=11), 0.5, 0.5)
+        with self.assertRaises(ValueError):
+            cal.fit()
+
+    def test_nonlinear_features_beat_linear(self):
+        """Цель нелинейна по центрам радужек: poly2 и rff заметно точнее линейной модели."""
+        rng = np.random.default_rng(0)
+
+        def session(n):
+            uv = rng.uniform(0.0, 1.0, (n, 2))
+            kp = rng.normal(0.0, 0.01, (n, N_ROWS, 2))
+            kp[:, ROWS["left_iris"]] += 5.0 * uv[:, None]
+            kp[:, ROWS["right_iris"]] += 5.0 * uv[:, None]
+            kp[:, ROWS["scale"]] = 1.0
+            return kp, 0.2 + 0.6 * uv ** 2
+
+        train_kp, train_xy = session(400)
+        test_kp, test_xy = session(200)
+        errors = {}
+        for kind in ("linear", "poly2", "rff"):
+            cal = GazeCalibrator(alpha=0.1, features=kind)
+            cal.add_batch(train_kp, train_xy)
+            cal.fit()
+            errors[kind] = np.abs(cal.predict_batch(test_kp) - test_xy).mean()
+        self.assertLess(errors["poly2"], 0.5 * errors["linear"])
+        self.assertLess(errors["rff"], 0.5 * errors["linear"])
+
+    def test_nonlinear_predict_in_0_1(self):
+        for kind in ("poly2", "rff"):
+            cal = self._fitted(kind)
+            self.assertTrue(cal.fitted)
+            x, y = cal.predict(_make_key_points(42))
+            self.assertTrue(0.0 <= x <= 1.0 and 0.0 <= y <= 1.0, kind)
+
+    def test_predict_batch_matches_predict(self):
+        for kind in ("linear", "poly2", "rff"):
+            cal = self._fitted(kind)
+            batch = np.stack([_make_key_points(s) for s in range(20, 25)])
+            xy = cal.predict_batch(batch)
+            self.assertEqual(xy.shape, (5, 2))
+            for row, kp in zip(xy, batch):
+                np.testing.assert_allclose(row, cal.predict(kp))
+
+    def test_rff_is_deterministic_for_seed(self):
+        a = self._fitted(FeatureMap("rff", n_components=16, seed=7))
+        b = self._fitted(FeatureMap("rff", n_components=16, seed=7))
+        kp = _make_key_points(99)
+        self.assertEqual(a.predict(kp), b.predict(kp))
+
+    def test_save_load_preserves_feature_map(self):
+        for kind in ("poly2", "rff"):
+            cal = self._fitted(kind)
+            with tempfile.TemporaryDirectory() as tmp:
+                path = Path(tmp) / "calib.pkl"
+                cal.save(path)
+                loaded = GazeCalibrator.load(path)
+            self.assertEqual(loaded.features.kind, kind)
+            kp = _make_key_points(5)
+            self.assertEqual(loaded.predict(kp), cal.predict(kp))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,147 @@
+"""
+Модульные тесты оценки калибратора: leave-one-point-out, параллельный запуск, кэш результатов.
+"""
+
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from threadpoolctl import threadpool_info
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from calibrator import GazeCalibrator
+from evaluate import _single_thread_blas, config_hash, evaluate_session, load_session, make_calibrator, run, summarize
+from schema import N_ROWS, ROWS
+
+CONFIGS = [
+    {"alpha": 0.5, "features": "linear"},
+    {"alpha": 0.5, "features": "poly2"},
+]
+
+
+def _write_session(path: Path, seed: int = 0, frames: int = 5) -> None:
+    """Синтетическая сессия: радужки смещаются вместе с целевой точкой 3x3."""
+    rng = np.random.default_rng(seed)
+    cal = GazeCalibrator()
+    grid = np.linspace(0.2, 0.8, 3)
+    for tx in grid:
+        for ty in grid:
+            for _ in range(frames):
+                kp = rng.normal(0.0, 0.01, (N_ROWS, 2))
+                kp[ROWS["left_iris"]] += (10 * tx, 10 * ty)
+                kp[ROWS["right_iris"]] += (10 * tx, 10 * ty)
+                kp[ROWS["scale"]] = 1.0
+                cal.add(kp, tx, ty)
+    cal.save_session(path)
+
+
+class TestEvaluateSession(unittest.TestCase):
+    """Сценарии: оценка одной сессии."""
+
+    def test_save_session_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.npz"
+            _write_session(path)
+            features, targets = load_session(path)
+        self.assertEqual(features.shape, (45, N_ROWS, 2))
+        self.assertEqual(features.dtype, np.float32)
+        self.assertEqual(targets.shape, (45, 2))
+
+    def test_make_calibrator_applies_config(self):
+        cal = make_calibrator({"alpha": 2.0, "features": "rff", "n_components": 8, "seed": 3})
+        self.assertEqual(cal.reg_x.alpha, 2.0)
+        self.assertEqual(cal.features.kind, "rff")
+        self.assertEqual(cal.features.n_components, 8)
+
+    def test_leave_one_point_out_metrics(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.npz"
+            _write_session(path)
+            features, targets = load_session(path)
+        m = evaluate_session(features, targets, CONFIGS[0])
+        self.assertEqual(m["n_points"], 9)
+        self.assertLess(m["mean_error"], 0.1)
+        self.assertGreater(m["fit_ms"], 0.0)
+        self.assertGreater(m["predict_us"], 0.0)
+
+
+    def test_config_hash_uses_resolved_parameters(self):
+        """Умолчания и явная запись той же модели дают один ключ кэша, разные модели — разные."""
+        explicit = {"features": "rff", "n_components": 128, "gamma": 1 / 12, "seed": 0, "alpha": 0.5}
+        self.assertEqual(config_hash({"features": "rff"}), config_hash(explicit))
+        self.assertEqual(config_hash({}), config_hash({"alpha": 0.5, "features": "linear"}))
+        self.assertNotEqual(config_hash({"features": "rff"}), config_hash({**explicit, "gamma": 0.5}))
+        self.assertNotEqual(config_hash({"features": "rff"}), config_hash({"features": "rff", "alpha": 5.0}))
+
+
+class TestEvaluateRun(unittest.TestCase):
+    """Сценарии: параллельный прогон по каталогу и кэш."""
+
+    def test_run_uses_cache_on_rerun(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sessions = Path(tmp) / "sessions"
+            cache = Path(tmp) / "cache"
+            _write_session(sessions / "a.npz", seed=0)
+            _write_session(sessions / "b.npz", seed=1)
+            first = run(sessions, CONFIGS, cache, workers=2)
+            self.assertEqual(len(first), 4)
+            self.assertFalse(any(r["cached"] for r in first))
+
+            _write_session(sessions / "b.npz", seed=2)
+            second = run(sessions, CONFIGS, cache, workers=2)
+            recomputed = {r["session"] for r in second if not r["cached"]}
+            self.assertEqual(recomputed, {"b.npz"})
+
+    def test_bad_session_does_not_lose_finished_work(self):
+        """Повреждённая сессия даёт записи с ошибкой, остальные пары сразу попадают в кэш."""
+        with tempfile.TemporaryDirectory() as tmp:
+            sessions = Path(tmp) / "sessions"
+            cache = Path(tmp) / "cache"
+            _write_session(sessions / "a.npz", seed=0)
+            _write_session(sessions / "b.npz", seed=1)
+            (sessions / "c.npz").write_bytes(b"not a zip")
+            first = run(sessions, CONFIGS, cache, workers=2)
+            errors = [r for r in first if "error" in r]
+            self.assertEqual({r["session"] for r in errors}, {"c.npz"})
+            self.assertEqual(len(list(cache.glob("*.json"))), 4)
+            self.assertEqual(len(summarize(first)), 2)
+
+            second = run(sessions, CONFIGS, cache, workers=2)
+            recomputed = {r["session"] for r in second if not r["cached"]}
+            self.assertEqual(recomputed, {"c.npz"})
+
+    def test_truncated_cache_entry_is_recomputed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sessions = Path(tmp) / "sessions"
+            cache = Path(tmp) / "cache"
+            _write_session(sessions / "a.npz")
+            run(sessions, CONFIGS[:1], cache, workers=1)
+            entry = next(cache.glob("*.json"))
+            entry.write_text(entry.read_text(encoding="utf-8")[:10], encoding="utf-8")
+            again = run(sessions, CONFIGS[:1], cache, workers=1)
+            self.assertFalse(again[0]["cached"])
+            self.assertEqual(list(cache.glob("*.tmp")), [])
+
+    def test_pool_workers_use_single_blas_thread(self):
+        """Замеры fit/predict в пуле не делят ядра между многопоточными BLAS."""
+        with ProcessPoolExecutor(max_workers=1, initializer=_single_thread_blas) as pool:
+            info = pool.submit(threadpool_info).result()
+        blas = [i for i in info if i["user_api"] == "blas"]
+        self.assertTrue(blas)
+        self.assertTrue(all(i["num_threads"] == 1 for i in blas))
+
+    def test_summarize_groups_by_config(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sessions = Path(tmp) / "sessions"
+            _write_session(sessions / "a.npz")
+            rows = summarize(run(sessions, CONFIGS, Path(tmp) / "cache", workers=1))
+        self.assertEqual(len(rows), 2)
+        self.assertLessEqual(rows[0]["mean_error"], rows[1]["mean_error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
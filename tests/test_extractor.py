@@ -4,6 +4,7 @@
 
 import unittest
 from pathlib import Path
+from types import SimpleNamespace
 
 import numpy as np
 
@@ -11,6 +12,13 @@ import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from extractor import GazeExtractor
+from schema import LANDMARK_INDEX, N_ROWS, ROWS
+
+
+def _fake_result(xy: np.ndarray) -> SimpleNamespace:
+    """Ответ FaceMesh.process с одним лицом из нормализованных координат (478, 2)."""
+    landmarks = [SimpleNamespace(x=float(x), y=float(y)) for x, y in xy]
+    return SimpleNamespace(multi_face_landmarks=[SimpleNamespace(landmark=landmarks)])
 
 
 class TestGazeExtractorInit(unittest.TestCase):
@@ -45,6 +53,43 @@ class TestGazeExtractorNoFace(unittest.TestCase):
         self.assertIsNone(result)
 
 
+class TestGazeExtractorLayout(unittest.TestCase):
+    """Сценарии: раскладка key_points по схеме (FaceMesh подменён синтетическими ландмарками)."""
+
+    def setUp(self):
+        self.ext = GazeExtractor()
+        self.frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        self.xy = np.random.default_rng(0).uniform(0.3, 0.7, (478, 2))
+
+    def _extract(self, xy):
+        self.ext.face_mesh.process = lambda rgb: _fake_result(xy)
+        return self.ext.extract(self.frame)
+
+    def test_first_frame_matches_schema_layout(self):
+        kp = self._extract(self.xy)
+        self.assertEqual(kp.shape, (N_ROWS, 2))
+        self.assertEqual(kp.dtype, np.float32)
+        points = self.xy * (640, 480)
+        center = (points.min(axis=0) + points.max(axis=0)) / 2
+        expected = points[LANDMARK_INDEX] - center
+        np.testing.assert_allclose(kp[: len(LANDMARK_INDEX)], expected, atol=1e-3)
+        np.testing.assert_allclose(kp[ROWS["left_iris"]][0], points[473] - center, atol=1e-3)
+        np.testing.assert_allclose(kp[ROWS["scale"]][0], (1.0, 1.0), atol=1e-5)
+        np.testing.assert_allclose(kp[ROWS["head_offset"]][0], (0.0, 0.0), atol=1e-3)
+
+    def test_scale_and_head_offset_follow_reference(self):
+        """Лицо вдвое меньше и сдвинуто: scale = 2, смещение — в пикселях, точки глаз домножены на scale_x."""
+        self._extract(self.xy)
+        moved = self.xy * 0.5 + 0.1
+        kp = self._extract(moved)
+        ref = self.xy * (640, 480)
+        points = moved * (640, 480)
+        center = (points.min(axis=0) + points.max(axis=0)) / 2
+        np.testing.assert_allclose(kp[ROWS["scale"]][0], (2.0, 2.0), rtol=1e-4)
+        np.testing.assert_allclose(kp[ROWS["head_offset"]][0], points.min(axis=0) - ref.min(axis=0), atol=1e-2)
+        np.testing.assert_allclose(kp[ROWS["right_iris"]][0], (points[468] - center) * 2.0, atol=1e-2)
+
+
 class TestGazeExtractorReference(unittest.TestCase):
     """Сценарии: сброс опорной позиции головы."""
 
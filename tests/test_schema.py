@@ -0,0 +1,83 @@
+"""
+Модульные тесты схемы признаков: индексы ландмарок, раскладка строк, буфер float32.
+"""
+
+import unittest
+from pathlib import Path
+
+import mediapipe as mp
+import numpy as np
+
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from schema import (
+    FEATURE_DTYPE,
+    LANDMARK_INDEX,
+    LEFT_EYE,
+    N_FEATURES,
+    N_ROWS,
+    RIGHT_EYE,
+    ROWS,
+    FeatureBuffer,
+)
+
+
+def _vertices(edges) -> set:
+    return {i for edge in edges for i in edge}
+
+
+class TestFeatureSchema(unittest.TestCase):
+    """Сценарии: фиксированная раскладка признаков."""
+
+    def test_eye_indices_match_mediapipe_contours(self):
+        """Индексы глаз — все вершины контуров MediaPipe, без повторов, по возрастанию."""
+        face_mesh = mp.solutions.face_mesh
+        self.assertEqual(set(LEFT_EYE), _vertices(face_mesh.FACEMESH_LEFT_EYE))
+        self.assertEqual(set(RIGHT_EYE), _vertices(face_mesh.FACEMESH_RIGHT_EYE))
+        self.assertEqual(list(LEFT_EYE), sorted(set(LEFT_EYE)))
+        self.assertEqual(list(RIGHT_EYE), sorted(set(RIGHT_EYE)))
+
+    def test_landmark_indices_unique(self):
+        self.assertEqual(len(set(LANDMARK_INDEX.tolist())), len(LANDMARK_INDEX))
+
+    def test_rows_cover_layout(self):
+        """Группы строк идут подряд и покрывают все N_ROWS строк."""
+        self.assertEqual(ROWS["left_eye"].start, 0)
+        self.assertEqual(ROWS["head_offset"].stop, N_ROWS)
+        self.assertEqual(N_FEATURES, 2 * N_ROWS)
+        self.assertEqual(FEATURE_DTYPE.itemsize, N_FEATURES * 4)
+
+
+class TestFeatureBuffer(unittest.TestCase):
+    """Сценарии: предвыделенный буфер float32."""
+
+    def test_append_grows_and_keeps_data(self):
+        buf = FeatureBuffer(capacity=2)
+        rows = [np.full((N_ROWS, 2), i, dtype=np.float64) for i in range(5)]
+        for r in rows:
+            buf.append(r)
+        self.assertEqual(len(buf), 5)
+        self.assertEqual(buf.view().dtype, np.float32)
+        np.testing.assert_array_equal(buf.view()[:, 0, 0], np.arange(5))
+
+    def test_flat_and_records_are_views(self):
+        buf = FeatureBuffer()
+        kp = np.arange(N_FEATURES, dtype=np.float32).reshape(N_ROWS, 2)
+        buf.append(kp)
+        flat = buf.flat()
+        self.assertEqual(flat.shape, (1, N_FEATURES))
+        self.assertTrue(np.shares_memory(flat, buf.view()))
+        rec = buf.records()
+        np.testing.assert_array_equal(rec["left_iris"][0], kp[ROWS["left_iris"]])
+        np.testing.assert_array_equal(rec["scale"][0], kp[ROWS["scale"]])
+
+    def test_records_reject_foreign_layout(self):
+        buf = FeatureBuffer()
+        buf.append(np.zeros((10, 2)))
+        with self.assertRaises(ValueError):
+            buf.records()
+
+
+if __name__ == "__main__":
+    unittest.main()